@@ -0,0 +1,261 @@
+import numpy as np
+
+from pathfinding import KNIGHT, BOARD_WIDTH, BOARD_HEIGHT, FLAT, TORUS, leaper_moves, table_distance
+
+# Single-source leaper distances for every square of a width x height board as a (height, width)
+# int32 array, -1 where the square cannot be reached or is blocked. The board is stored flat with
+# a blocked border as wide as the longest leap, so each BFS layer expands every move of the whole
+# frontier with a few array operations and no bounds checks. With a goal the search stops once the
+# goal's layer is reached. Wrapped topologies have no border to pad, their moves come from a table
+# of every square's neighbours instead.
+def distance_field(start, width=BOARD_WIDTH, height=BOARD_HEIGHT, goal=None, leaper=KNIGHT, topology=FLAT,
+                   blocked=()):
+    if topology != FLAT:
+        return _wrapped_distance_field(start, width, height, goal, leaper, topology, blocked)
+
+    padding = max(leaper)
+    padded_width = width + 2 * padding
+    padded_height = height + 2 * padding
+    distance = np.full((padded_height, padded_width), -2, dtype=np.int32)
+    distance[padding:-padding, padding:-padding] = -1
+    for col, row in blocked:
+        distance[row + padding, col + padding] = -2
+    distance = distance.ravel()
+    offsets = np.array([move[1] * padded_width + move[0] for move in leaper_moves(leaper)], dtype=np.int64)
+
+    def padded(square):
+        return (square[1] + padding) * padded_width + square[0] + padding
+
+    frontier_bfs(distance, padded(start), lambda frontier: (frontier[:, None] + offsets).ravel(),
+                 None if goal is None else padded(goal))
+    # Blocked squares are marked -2 while searching and reported as unreachable like the rest
+    return np.maximum(distance.reshape(padded_height, padded_width)[padding:-padding, padding:-padding], -1)
+
+
+# distance_field for wrapped boards. Row s of the neighbour table lists the squares every move
+# from square s lands on, with moves off an unwrapped edge sent to a spare always-blocked square.
+def _wrapped_distance_field(start, width, height, goal, leaper, topology, blocked):
+    squares = width * height
+    cols = np.arange(squares) % width
+    rows = np.arange(squares) // width
+    moves = leaper_moves(leaper)
+    neighbors = np.empty((squares, len(moves)), dtype=np.int64)
+    for index, (dx, dy) in enumerate(moves):
+        x, y = cols + dx, rows + dy
+        if topology[0]:
+            x %= width
+        if topology[1]:
+            y %= height
+        inside = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+        neighbors[:, index] = np.where(inside, y * width + x, squares)
+
+    distance = np.full(squares + 1, -1, dtype=np.int32)
+    distance[squares] = -2
+    for col, row in blocked:
+        distance[row * width + col] = -2
+    frontier_bfs(distance, start[1] * width + start[0], lambda frontier: neighbors[frontier].ravel(),
+                 None if goal is None else goal[1] * width + goal[0])
+    return np.maximum(distance[:squares].reshape(height, width), -1)
+
+
+# Breadth-first layers over a flat int32 distance array, filled in place from the start cell.
+# Open cells hold -1 and blocked cells -2, and expand must send every move that leaves the board to
+# a blocked cell. expand returns every cell one move from an array of frontier cells, duplicates
+# included.
+# With a goal cell the search stops once the goal's layer is reached.
+def frontier_bfs(distance, start, expand, goal=None):
+    owner = np.zeros(distance.size, dtype=np.int64)
+    frontier = np.array([start], dtype=np.int64)
+    distance[frontier] = 0
+    step = 0
+    while frontier.size and (goal is None or distance[goal] < 0):
+        step += 1
+        reached = expand(frontier)
+        reached = reached[distance[reached] == -1]
+
+        # Drop duplicates without sorting: only the last writer of each cell keeps it
+        position = np.arange(reached.size)
+        owner[reached] = position
+        reached = reached[owner[reached] == position]
+
+        distance[reached] = step
+        frontier = reached
+
+
+# Shortest path to goal read back from a distance field, ([], None) when goal is unreachable
+def field_path(field, goal, leaper=KNIGHT, topology=FLAT):
+    height, width = field.shape
+    moves = leaper_moves(leaper)
+    cost = int(field[goal[1], goal[0]])
+    if cost < 0:
+        return [], None
+
+    def neighbors(square):
+        for move in moves:
+            x, y = square[0] + move[0], square[1] + move[1]
+            if topology[0]:
+                x %= width
+            if topology[1]:
+                y %= height
+            if 0 <= x < width and 0 <= y < height:
+                yield x, y
+
+    return step_back_path(goal, cost, neighbors, lambda square: field[square[1], square[0]]), cost
+
+
+# Path from the start of a distance array to a goal cost moves away, stepping back to any
+# neighbour one move closer until the start is reached. neighbors(cell) yields the cells one move
+# from cell on the board, and distance(cell) reads the array.
+def step_back_path(goal, cost, neighbors, distance):
+    path = [goal]
+    current = goal
+    for remaining in range(cost - 1, -1, -1):
+        current = next(cell for cell in neighbors(current) if distance(cell) == remaining)
+        path.append(current)
+    path.reverse()
+    return path
+
+
+# Distance-field search with the same (path, cost) result as a_star
+def numpy_bfs(start, goal, width=BOARD_WIDTH, height=BOARD_HEIGHT, leaper=KNIGHT, topology=FLAT):
+    return field_path(distance_field(start, width, height, goal, leaper, topology), goal, leaper, topology)
+
+
+# All-pairs distances from one distance field per start square that translations cannot reach.
+# Shifting both squares along a wrapped axis keeps their distance, so a torus needs the single
+# field from (0, 0) and a cylinder one field per unwrapped row or column: O(squares) memory and
+# work instead of the O(squares ** 2) of a table over every pair. Returns an array indexed
+# [start_row, start_col, goal_row, goal_col] with 1 along each wrapped start axis.
+def translation_fields(width=BOARD_WIDTH, height=BOARD_HEIGHT, leaper=KNIGHT, topology=TORUS):
+    start_cols = 1 if topology[0] else width
+    start_rows = 1 if topology[1] else height
+    fields = np.empty((start_rows, start_cols, height, width), dtype=np.int32)
+    for row in range(start_rows):
+        for col in range(start_cols):
+            fields[row, col] = distance_field((col, row), width, height, leaper=leaper, topology=topology)
+    return fields
+
+
+# Distances for many (start, goal) pairs looked up in translation_fields, in the same pairs format
+# and with the same -1 for unreachable pairs as batch_distances
+def translated_distances(fields, pairs, topology=TORUS):
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 4)
+    start_col, start_row, goal_col, goal_row = pairs.T
+    height, width = fields.shape[2:]
+
+    # Translate each pair so its start lands on the square the fields were grown from
+    if topology[0]:
+        goal_col = (goal_col - start_col) % width
+        start_col = np.zeros_like(start_col)
+    if topology[1]:
+        goal_row = (goal_row - start_row) % height
+        start_row = np.zeros_like(start_row)
+    return fields[start_row, start_col, goal_row, goal_col].astype(np.int64)
+
+
+# Square where knights on the given (col, row) squares can all meet in the fewest moves, and that
+# cost. objective 'total' minimizes the moves of all knights together and 'max' the moves of the
+# knight with the furthest to go, ties going to the lower total. Every knight needs one distance
+# field, and the fields are added or maxed square by square, so there is no search per knight
+# and square. Returns (None, None) when no square is reachable by every knight. With paths=True
+# also returns each knight's path to the meeting square.
+def meeting_square(knights, width=BOARD_WIDTH, height=BOARD_HEIGHT, objective='total', blocked=(),
+                   leaper=KNIGHT, topology=FLAT, paths=False):
+    if objective not in ('total', 'max'):
+        raise ValueError(f"objective must be 'total' or 'max', not {objective!r}")
+
+    total = np.zeros((height, width), dtype=np.int64)
+    worst = np.zeros((height, width), dtype=np.int64)
+    reachable = np.ones((height, width), dtype=bool)
+    fields = []
+    for knight in knights:
+        field = distance_field(knight, width, height, leaper=leaper, topology=topology, blocked=blocked)
+        reachable &= field >= 0
+        total += field
+        np.maximum(worst, field, out=worst)
+        if paths:
+            fields.append(field)
+
+    if not reachable.any():
+        return (None, None, []) if paths else (None, None)
+    total[~reachable] = np.iinfo(np.int64).max
+    if objective == 'max':
+        worst[~reachable] = np.iinfo(np.int64).max
+        total[worst != worst.min()] = np.iinfo(np.int64).max
+    index = int(np.argmin(total))
+    square = (index % width, index // width)
+    cost = int(total.flat[index] if objective == 'total' else worst.flat[index])
+
+    if not paths:
+        return square, cost
+    return square, cost, [field_path(field, square, leaper, topology)[0] for field in fields]
+
+
+# Exact knight distances for many (start, goal) pairs at once, the vectorized form of
+# knight_distance. pairs is array-like of ((col, row), (col, row)); returns an int64 array
+# with -1 for unreachable pairs. With paths=True also returns one shortest path per pair,
+# read from a single distance field per distinct start square.
+def batch_distances(pairs, width=BOARD_WIDTH, height=BOARD_HEIGHT, paths=False):
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 4)
+    start_col, start_row, goal_col, goal_row = pairs.T
+
+    if max(width, height) < 5:
+        # Tiny boards are irregular, look every pair up in the all-pairs table instead
+        squares = width * height
+        table = np.array([[table_distance((start % width, start // width), (goal % width, goal // width),
+                                          width, height)
+                           for start in range(squares)] for goal in range(squares)], dtype=np.int64)
+        distances = table[goal_row * width + goal_col, start_row * width + start_col]
+    else:
+        distances = _closed_form_distances(start_col, start_row, goal_col, goal_row, width, height)
+
+    if not paths:
+        return distances
+
+    # One field per distinct start square answers all of its goals
+    path_list = [[] for _ in range(len(pairs))]
+    starts, groups = np.unique(pairs[:, :2], axis=0, return_inverse=True)
+    groups = groups.ravel()
+    members_by_start = np.split(np.argsort(groups, kind='stable'), np.cumsum(np.bincount(groups))[:-1])
+    for start, members in zip(starts, members_by_start):
+        field = distance_field((int(start[0]), int(start[1])), width, height)
+        for member in members:
+            path_list[member] = field_path(field, (int(goal_col[member]), int(goal_row[member])))[0]
+    return distances, path_list
+
+
+# Vectorized knight_distance for boards with at least five squares along one side
+def _closed_form_distances(start_col, start_row, goal_col, goal_row, width, height):
+    # Work with the short side along x, as knight_distance does
+    if width > height:
+        start_col, start_row, goal_col, goal_row = start_row, start_col, goal_row, goal_col
+        width, height = height, width
+    dx = np.abs(goal_col - start_col)
+    dy = np.abs(goal_row - start_row)
+
+    if width == 1:
+        return np.where(dy == 0, 0, -1)
+    if width == 2:
+        moves = dy // 2
+        return np.where((dy % 2 == 0) & (moves % 2 == dx), moves, -1)
+
+    # Unbounded board distance
+    long_side = np.maximum(dx, dy)
+    short_side = np.minimum(dx, dy)
+    delta = long_side - short_side
+    distances = np.where(short_side > delta, delta - 2 * ((delta - short_side) // 3),
+                         delta - 2 * ((delta - short_side) // 4))
+    distances[(long_side == 1) & (short_side == 0)] = 3
+    distances[(long_side == 2) & (short_side == 2)] = 4
+
+    # Corner and narrow-board exceptions
+    def is_corner(col, row):
+        return ((col == 0) | (col == width - 1)) & ((row == 0) | (row == height - 1))
+
+    diagonal = (dx == 1) & (dy == 1)
+    distances[diagonal & (is_corner(start_col, start_row) | is_corner(goal_col, goal_row))] = 4
+    if width == 3:
+        distances[(dx == 0) & (dy == 2) & (start_col == 1)] = 4
+    if width == 4:
+        distances[(dx == 3) & (dy == 0) & ((start_row == 0) | (start_row == height - 1))] = 5
+    return distances
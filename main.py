@@ -1,7 +1,13 @@
 import pygame
-import heapq
 import math
 
+from replanning import LifelongPlanner
+from pathfinding import (BOARD_HEIGHT, BOARD_WIDTH, PathCache, a_star, all_pairs_table, bfs, bidirectional_bfs,
+                         bitboard_bfs, count_shortest_paths, dijkstra, nearest_goal, search_tree, table_path,
+                         tree_path)
+from tours import knights_tour
+from distance_fields import meeting_square
+
 # Initialize Pygame and set up the display
 pygame.init()
 screen = pygame.display.set_mode((600, 700))
@@ -15,22 +21,36 @@ BLACK = (20, 20, 20)
 GRAY = (40, 40, 40, 128)
 RED = (255, 0, 0)
 HIGHLIGHT = (255, 255, 255)
+PREVIEW = (90, 90, 90)
+
+# Constants for chessboard setup, squares are sized so the longer side of the board fills 600 pixels
+SQUARE_SIZE = 600 // max(BOARD_WIDTH, BOARD_HEIGHT)
+
+# Smallest square the board can still be drawn and clicked on with, 60 squares along a side
+MIN_SQUARE_SIZE = 10
+if SQUARE_SIZE < MIN_SQUARE_SIZE:
+    raise SystemExit(f'A {BOARD_WIDTH}x{BOARD_HEIGHT} board does not fit the window, which draws at most '
+                     f'{600 // MIN_SQUARE_SIZE} squares along a side. Call the engines in pathfinding.py '
+                     f'directly for larger boards.')
 
-# Constants for chessboard setup
-BOARD_SIZE = 8
-SQUARE_SIZE = 600 // BOARD_SIZE
+KNIGHT_SIZE = SQUARE_SIZE
+PAWN_SIZE = SQUARE_SIZE * 13 // 15
+
+# Largest board, in squares, that gets the all-pairs lookup table
+TABLE_SQUARES = 1024
 
 # Load assets for graphics and fonts
 board_graphic = pygame.image.load('assets/chessboard.jpg')
 resized_board_graphic = pygame.transform.scale(board_graphic, (600,600))
 
 knight_graphic = pygame.image.load('assets/knight.png')
-resized_knight_graphic = pygame.transform.scale(knight_graphic, (75, 75))
+resized_knight_graphic = pygame.transform.scale(knight_graphic, (KNIGHT_SIZE, KNIGHT_SIZE))
 
 pawn_graphic = pygame.image.load('assets/pawn.png')
-resized_pawn_graphic = pygame.transform.scale(pawn_graphic, (65, 65))
+resized_pawn_graphic = pygame.transform.scale(pawn_graphic, (PAWN_SIZE, PAWN_SIZE))
 
 font = pygame.font.Font('assets/RobotoMono.ttf', 20)
+terrain_font = pygame.font.Font('assets/RobotoMono.ttf', 12)
 
 pygame.display.set_icon(knight_graphic)
 
@@ -38,42 +58,122 @@ pygame.display.set_icon(knight_graphic)
 user_text = [
     'Select a square to place the knight',
     'Select another square to traverse to',
-    '',  # A* result
-    '',   # Dijkstra result
-    'Press Left Shift to reset board'
+    '',  # Search result
+    'Press Left Shift to reset board, right click to place pawns, P for the nearest pawn',
+    'Press B to block or clear the hovered square, T to raise its terrain cost',
+    'Press K for a knight\'s tour from the knight or the corner, with no squares blocked',
+    'Press N to add or remove a knight on the hovered square, G to gather all knights'
 ]
 
-# Function to render the chessboard and display user instructions
-def draw_board():
-    for row in range(BOARD_SIZE):
-        for col in range(BOARD_SIZE):
+# Function to draw the squares, with the chessboard graphic over them on the standard 8x8 board
+def draw_squares():
+    for row in range(BOARD_HEIGHT):
+        for col in range(BOARD_WIDTH):
             color = CHESSWHITE if (row + col) % 2 == 0 else CHESSBLACK
             pygame.draw.rect(screen, color, (col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
+    if BOARD_WIDTH == BOARD_HEIGHT == 8:
+        screen.blit(resized_board_graphic, (0, 0))
 
+# Function to render the chessboard and display user instructions
+def draw_board():
+    global path_count
     font = pygame.font.Font('assets/RobotoMono.ttf', 12)
-    screen.blit(font.render(user_text[4], True, 'white'), (5, 600)) # Left shift to reset board te
+    screen.blit(font.render(user_text[3], True, 'white'), (5, 600)) # Left shift to reset board te
+    screen.blit(font.render(user_text[4], True, 'white'), (5, 614))
+    screen.blit(font.render(user_text[5], True, 'white'), (5, 628))
+    screen.blit(font.render(user_text[6], True, 'white'), (5, 642))
     font = pygame.font.Font('assets/RobotoMono.ttf', 20)
     
     # Display appropriate instructions or results based on the game state
-    if current_path:
-        text_to_show = user_text[2] if use_a_star else user_text[3]
-        screen.blit(font.render(text_to_show, True, 'white'), (85, 635))
+    if goal_pos is not None:
+        screen.blit(font.render(user_text[2], True, 'white'), (85, 656))
+        if show_path_count:
+            if path_count is None:
+                path_count = count_shortest_paths(start_pos, goal_pos, blocked=blocked)[0]
+            screen.blit(font.render(f'Shortest paths: {path_count}', True, 'white'), (85, 678))
     else:
-        screen.blit(font.render(user_text[0] if start_pos is None else user_text[1], True, 'white'), (85, 635))
-
-    # Draw the scaled chessboard graphic over the board
-    screen.blit(resized_board_graphic, (0, 0))
+        # Before the goal is placed the result line only holds a message such as an unreachable pawn
+        message = user_text[0] if start_pos is None else user_text[2] or user_text[1]
+        screen.blit(font.render(message, True, 'white'), (85, 656))
 
-# Predefined moves for a knight in chess
-knight_moves = [
-    (2, 1), (1, 2), (-1, 2), (-2, 1),
-    (-2, -1), (-1, -2), (1, -2), (2, -1)
-]
+    draw_squares()
+    draw_overlays()
 
 # Variables for the starting position and goal position
 start_pos = None
 goal_pos = None
 
+# Squares holding a pawn, placed and removed with the right mouse button
+pawns = set()
+
+# Squares the knight may not land on, toggled with B, and the planner that repairs the path
+blocked = set()
+planner = None
+
+# Number of distinct shortest paths between start_pos and goal_pos, shown under the result.
+# It is counted when it is next drawn, and reset to None by every edit that changes it.
+show_path_count = False
+path_count = None
+
+# Extra knights placed with N, and the paths that gather them and the placed knight with G.
+# Each press of G switches between the fewest moves in total and the shortest longest journey.
+knights = set()
+gather_paths = []
+gather_objectives = [('total', 'Meeting Square Total Cost'), ('max', 'Meeting Square Longest Journey')]
+gather_index = 0
+
+
+# Cost of entering each square for Dijkstra, indexed row * BOARD_WIDTH + col and raised with T
+MAX_TERRAIN = 5
+terrain = [1] * (BOARD_WIDTH * BOARD_HEIGHT)
+
+
+# Function to map a pixel position to the (col, row) square under it, None off the board
+def square_at(position):
+    col, row = position[0] // SQUARE_SIZE, position[1] // SQUARE_SIZE
+    if col < BOARD_WIDTH and row < BOARD_HEIGHT:
+        return col, row
+    return None
+
+
+# Function to shade every blocked square
+def draw_blocked():
+    for x, y in blocked:
+        pygame.draw.rect(screen, BLACK, (x * SQUARE_SIZE, y * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
+
+
+# Function to label every square whose terrain costs more than one move
+def draw_terrain():
+    for square, cost in enumerate(terrain):
+        if cost > 1:
+            x, y = square % BOARD_WIDTH, square // BOARD_WIDTH
+            screen.blit(terrain_font.render(f'x{cost}', True, 'white'), (x * SQUARE_SIZE + 4, y * SQUARE_SIZE + 2))
+
+
+# Function to draw terrain, blocked squares and pawns over the board graphic
+def draw_overlays():
+    draw_terrain()
+    draw_blocked()
+    draw_pawns()
+    draw_knights()
+
+
+# Function to draw every extra knight on its square
+def draw_knights():
+    for x, y in knights:
+        screen.blit(resized_knight_graphic, (x * SQUARE_SIZE + SQUARE_SIZE // 2 - KNIGHT_SIZE * 7 // 15,
+                                             y * SQUARE_SIZE + SQUARE_SIZE // 2 - KNIGHT_SIZE * 8 // 15))
+
+
+# Function to draw every pawn centred on its square
+def draw_pawns():
+    for x, y in pawns:
+        screen.blit(resized_pawn_graphic, (x * SQUARE_SIZE + (SQUARE_SIZE - PAWN_SIZE) // 2, y * SQUARE_SIZE + (SQUARE_SIZE - PAWN_SIZE) // 2))
+
+# Search tree from start_pos for the hover preview, built when the preview first needs it and
+# reset to None when the start or the blocked squares change
+start_tree = None
+
 
 # Function to draw the knight
 def draw_knight(position, color, move = 0):
@@ -82,84 +182,72 @@ def draw_knight(position, color, move = 0):
     if position == start_pos or position == goal_pos:
         pygame.draw.circle(screen, color, (x * SQUARE_SIZE + SQUARE_SIZE // 2, y * SQUARE_SIZE + SQUARE_SIZE // 2), SQUARE_SIZE // 10)
         screen.blit(font.render(str(move), True, 'white'), (x * SQUARE_SIZE + SQUARE_SIZE // 2 - 6, y * SQUARE_SIZE + SQUARE_SIZE // 2 - 15))
-        screen.blit(resized_knight_graphic, (x * SQUARE_SIZE + SQUARE_SIZE // 2 - 35, y * SQUARE_SIZE + SQUARE_SIZE // 2 - 40))
+        screen.blit(resized_knight_graphic, (x * SQUARE_SIZE + SQUARE_SIZE // 2 - KNIGHT_SIZE * 7 // 15,
+                                             y * SQUARE_SIZE + SQUARE_SIZE // 2 - KNIGHT_SIZE * 8 // 15))
     else:
         pygame.draw.circle(screen, color, (x * SQUARE_SIZE + SQUARE_SIZE // 2, y * SQUARE_SIZE + SQUARE_SIZE // 2), SQUARE_SIZE // 4)
         screen.blit(font.render(str(move), True, 'white'), (x * SQUARE_SIZE + SQUARE_SIZE // 2 - 6, y * SQUARE_SIZE + SQUARE_SIZE // 2 - 15))
 
 
-# A* algorithm implementation
-def a_star(start, goal):
-    def heuristic(a, b):
-        return abs(a[0] - b[0]) + abs(a[1] - b[1])
-
-    open_list = []
-    heapq.heappush(open_list, (0, start))
-    came_from = {}
-    cost_so_far = {start: 0}
-
-    while open_list:
-        _, current = heapq.heappop(open_list)
-
-        if current == goal:
-            break
-
-        for move in knight_moves:
-            neighbor = (current[0] + move[0], current[1] + move[1])
-            if 0 <= neighbor[0] < BOARD_SIZE and 0 <= neighbor[1] < BOARD_SIZE:
-                new_cost = cost_so_far[current] + 1
-                if neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]:
-                    cost_so_far[neighbor] = new_cost
-                    priority = new_cost + heuristic(neighbor, goal)
-                    heapq.heappush(open_list, (priority, neighbor))
-                    came_from[neighbor] = current
-
-    # Reconstruct the path from the goal to the start
-    path = []
-    current = goal
-    while current != start:
-        path.append(current)
-        current = came_from.get(current, start)
-    path.append(start)
-    path.reverse()
-    return path, len(path) - 1
-
-# Dijkstra's algorithm for finding the shortest path
-def dijkstra(start, goal):
-    open_list = []
-    heapq.heappush(open_list, (0, start))
-    came_from = {}
-    cost_so_far = {start: 0}
-
-    while open_list:
-        current_cost, current = heapq.heappop(open_list)
-
-        if current == goal:
-            break
-
-        for move in knight_moves:
-            neighbor = (current[0] + move[0], current[1] + move[1])
-            if 0 <= neighbor[0] < BOARD_SIZE and 0 <= neighbor[1] < BOARD_SIZE:
-                new_cost = current_cost + 1
-                if neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]:
-                    cost_so_far[neighbor] = new_cost
-                    heapq.heappush(open_list, (new_cost, neighbor))
-                    came_from[neighbor] = current
-
-    # Reconstruct the path from the goal to the start
-    path = []
-    current = goal
-    while current != start:
-        path.append(current)
-        current = came_from.get(current, start)
-    path.append(start)
-    path.reverse()
-    return path, len(path) - 1
+# Search engines cycled with SPACE
+engines = [
+    ('A*', a_star),
+    ('Dijkstra', dijkstra),
+    ('BFS', bfs),
+    ('Bidirectional', bidirectional_bfs),
+]
+
+# The bitboard engine only covers the standard 8x8 board
+if BOARD_WIDTH == BOARD_HEIGHT == 8:
+    engines.append(('Bitboard', bitboard_bfs))
+
+# Results of earlier queries, so switching back to an engine or repeating a query after a reset
+# does not search again
+path_cache = PathCache()
+
+# The lookup table answers every query without searching, but grows with the square of the board.
+# Small boards build it before the first click needs it and start on it, larger ones leave it out.
+if BOARD_WIDTH * BOARD_HEIGHT <= TABLE_SQUARES:
+    all_pairs_table(BOARD_WIDTH, BOARD_HEIGHT)
+    engines.insert(0, ('Lookup Table', table_path))
+
+
+# Function to show an engine's cost, or that the goal cannot be reached.
+# A terrain cost that differs from the number of moves is shown along with the moves.
+def show_cost(name, cost, moves=None):
+    if cost is None:
+        user_text[2] = f'{name}: the goal cannot be reached'
+    elif moves is not None and moves != cost:
+        user_text[2] = f'{name} Terrain Cost: {cost} in {moves} moves'
+    else:
+        user_text[2] = f'{name} Implementation Cost: {cost} moves'
+
+
+# Function to run the selected engine and show its cost.
+# Dijkstra's algorithm prices the terrain and routes around blocked squares itself. For the engines
+# that count moves the incremental planner takes over once there are blocked squares.
+def find_path(engine_index):
+    global planner, show_path_count, path_count, gather_paths
+    show_path_count, path_count = True, None
+    gather_paths = []
+    name, engine = engines[engine_index]
+    if blocked and engine is not dijkstra:
+        planner = LifelongPlanner(start_pos, goal_pos, blocked=blocked)
+        path, cost = planner.path()
+        show_cost('LPA*', cost)
+        return path
+
+    planner = None
+    # Only Dijkstra's algorithm prices the terrain, the other engines count moves
+    board = {'terrain': terrain, 'blocked': blocked} if engine is dijkstra else {}
+    path, cost = path_cache.query(engine, start_pos, goal_pos, **board)
+    show_cost(name, cost, len(path) - 1)
+    return path
 
 # Main game loop to handle interactions and rendering
 running = True
 current_path = []
-use_a_star = True  # Toggle between A* and Dijkstra
+engine_index = 0  # Index into engines, changed with SPACE
 
 while running:
     screen.fill(BLACK)
@@ -171,62 +259,156 @@ while running:
             running = False
         elif event.type == pygame.MOUSEBUTTONDOWN:
             
-            mouse_x, mouse_y = event.pos
-            if mouse_y > 600:
+            # Nothing can be placed on a blocked square
+            square = square_at(event.pos)
+            if square is None or square in blocked:
                 continue
-            col = mouse_x // SQUARE_SIZE
-            row = mouse_y // SQUARE_SIZE
 
-            if start_pos is None:
-                start_pos = (col, row)
+            if event.button == 3:
+                # Toggle a pawn on any square except the knight's
+                if square in pawns:
+                    pawns.remove(square)
+                elif square != start_pos:
+                    pawns.add(square)
+            elif start_pos is None:
+                # A pawn on the start square is taken by the knight, and a gathering shown before
+                # the knight was placed is cleared so the next click picks the goal
+                start_pos = square
+                pawns.discard(square)
+                start_tree = None
+                goal_pos = None
+                gather_paths = []
+                user_text[2] = ''
             elif goal_pos is None:
-                goal_pos = (col, row)
-                
-
-                if use_a_star:
-                    current_path, cost = a_star(start_pos, goal_pos)
-                    user_text[2] = f'A* Implementation Cost: {cost} moves'
-                else:
-                    current_path, cost = dijkstra(start_pos, goal_pos)
-                    user_text[3] = f'Dijkstra Implementation Cost: {cost} moves'
+                goal_pos = square
+                current_path = find_path(engine_index)
 
         elif event.type == pygame.KEYDOWN:
             if event.key == pygame.K_LSHIFT:
                 # Reset the board and positions
                 start_pos = None
                 goal_pos = None
+                start_tree = None
+                planner = None
+                show_path_count = False
                 current_path = []
+                gather_paths = []
+                gather_index = 0
+                knights.clear()
+                pawns.clear()
+                blocked.clear()
+                terrain = [1] * (BOARD_WIDTH * BOARD_HEIGHT)
                 user_text[0] = 'Select a square to place the knight'
                 user_text[2] = ''
-                user_text[3] = ''
             elif event.key == pygame.K_SPACE:
-                # Toggle between A* and Dijkstra algorithms
-                use_a_star = not use_a_star
+                # Switch to the next search engine
+                engine_index = (engine_index + 1) % len(engines)
                 if start_pos and goal_pos:
-                    if use_a_star:
-                        current_path, cost = a_star(start_pos, goal_pos)
-                        user_text[2] = f'A* Implementation Cost: {cost} moves'
-                    else:
-                        current_path, cost = dijkstra(start_pos, goal_pos)
-                        user_text[3] = f'Dijkstra Implementation Cost: {cost} moves'
+                    current_path = find_path(engine_index)
+            elif event.key == pygame.K_p and start_pos is not None and pawns:
+                # Send the knight to the pawn it can reach in the fewest moves
+                pawn_path, cost = nearest_goal(start_pos, pawns, blocked=blocked)
+                if cost is None:
+                    # Keep the current path and say why it was not replaced
+                    user_text[2] = 'No pawn can be reached'
+                else:
+                    current_path = pawn_path
+                    goal_pos = current_path[-1]
+                    planner = None
+                    gather_paths = []
+                    show_path_count, path_count = True, None
+                    user_text[2] = f'Nearest Pawn Cost: {cost} moves'
+            elif event.key == pygame.K_b:
+                # Block or clear the hovered square, taking any pawn or extra knight off it, and
+                # repair the path around it
+                square = square_at(pygame.mouse.get_pos())
+                if square is not None and square != start_pos and square != goal_pos:
+                    blocked ^= {square}
+                    pawns.discard(square)
+                    knights.discard(square)
+                    start_tree = None
+                    if planner is not None:
+                        current_path, cost = planner.toggle_blocked(square)
+                        show_cost('LPA*', cost)
+                        path_count = None
+                    elif start_pos is not None and goal_pos is not None:
+                        current_path = find_path(engine_index)
+            elif event.key == pygame.K_t:
+                # Raise the hovered square's terrain cost, wrapping back to a single move
+                square = square_at(pygame.mouse.get_pos())
+                if square is not None:
+                    square = square[1] * BOARD_WIDTH + square[0]
+                    terrain[square] = terrain[square] % MAX_TERRAIN + 1
+                    if goal_pos is not None and planner is None:
+                        current_path = find_path(engine_index)
+            elif event.key == pygame.K_k and not blocked:
+                # Cover the whole board, numbering every square in the order the knight visits it.
+                # Tours cover every square, so K does nothing while any square is blocked.
+                tour = knights_tour(start_pos or (0, 0))
+                if tour is not None:
+                    current_path = tour
+                    start_pos, goal_pos = tour[0], tour[-1]
+                    pawns.discard(start_pos)
+                    start_tree = None
+                    planner = None
+                    show_path_count = False
+                    gather_paths = []
+                    user_text[2] = f"Knight's Tour: {len(tour) - 1} moves"
+            elif event.key == pygame.K_n:
+                # Add or remove an extra knight on the hovered square
+                square = square_at(pygame.mouse.get_pos())
+                if square is not None and square != start_pos and square not in blocked:
+                    knights ^= {square}
+                    gather_paths = []
+            elif event.key == pygame.K_g and knights:
+                # Bring every knight to the best meeting square, one distance field per knight
+                objective, label = gather_objectives[gather_index]
+                gatherers = knights | {start_pos} if start_pos is not None else knights
+                meeting, cost, paths = meeting_square(gatherers, objective=objective, blocked=blocked, paths=True)
+                if meeting is not None:
+                    goal_pos = meeting
+                    gather_paths = paths
+                    current_path = []
+                    start_tree = None
+                    planner = None
+                    show_path_count = False
+                    user_text[2] = f'{label}: {cost} moves'
+                    gather_index = (gather_index + 1) % len(gather_objectives)
 
     # Highlight the square under the mouse
-    if start_pos is None or goal_pos is None:
-        mouse_x, mouse_y = pygame.mouse.get_pos()
-        if mouse_y > 600:
-            continue
-        col = mouse_x // SQUARE_SIZE
-        row = mouse_y // SQUARE_SIZE
+    hovered = square_at(pygame.mouse.get_pos())
+    if (start_pos is None or goal_pos is None) and hovered is not None:
+        col, row = hovered
         pygame.draw.rect(screen, HIGHLIGHT, (col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE), 5)
+
+        # Preview the path to the hovered square from the cached search tree
+        if start_pos is not None:
+            if start_tree is None:
+                start_tree = search_tree(start_pos, blocked=blocked)
+            preview_path, preview_cost = tree_path(start_tree, hovered)
+            for move, pos in enumerate(preview_path):
+                draw_knight(pos, PREVIEW, move)
+            if preview_cost is not None:
+                screen.blit(font.render(f'Hovered square: {preview_cost} moves', True, 'white'), (85, 678))
     
     if start_pos is not None:
         start_col, start_row = start_pos
         pygame.draw.rect(screen, HIGHLIGHT, (start_col * SQUARE_SIZE, start_row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE), 5)
 
+    # Render every gathering knight's path to the meeting square
+    if gather_paths:
+        draw_squares()
+        draw_overlays()
+        for path in gather_paths:
+            for move, pos in enumerate(path):
+                draw_knight(pos, GRAY, move)
+        draw_knight(goal_pos, RED)
+
     # Render the knight and the calculated path
     if current_path:
         move = 0
-        screen.blit(resized_board_graphic, (0, 0))
+        draw_squares()
+        draw_overlays()
         for pos in current_path:
             draw_knight(pos, GRAY, move)
             move += 1
@@ -237,3 +419,4 @@ while running:
     clock.tick(60)
 
 pygame.quit()
+print(f'Path cache: {path_cache.hits} hits, {path_cache.misses} misses')
@@ -0,0 +1,914 @@
+import hashlib
+import heapq
+import math
+from array import array
+from collections import OrderedDict, deque
+from functools import lru_cache
+
+# Constants for chessboard setup, the board is BOARD_WIDTH columns by BOARD_HEIGHT rows
+BOARD_WIDTH = 8
+BOARD_HEIGHT = 8
+
+# Leapers jump a fixed (m, n) offset in any direction, m squares along one axis and n along the other
+KNIGHT = (1, 2)
+CAMEL = (1, 3)
+ZEBRA = (2, 3)
+GIRAFFE = (1, 4)
+
+
+# Every move of an (m, n) leaper, counterclockwise from the positive x axis
+def leaper_moves(leaper):
+    m, n = leaper
+    moves = {(dx, dy) for a, b in ((m, n), (n, m)) for dx in (a, -a) for dy in (b, -b)}
+    return sorted(moves, key=lambda move: math.atan2(move[1], move[0]) % (2 * math.pi))
+
+# Predefined moves for a knight in chess
+knight_moves = leaper_moves(KNIGHT)
+
+# Riders slide any number of steps along the moves of one or more leapers until blocked
+ROOK = ((0, 1),)
+BISHOP = ((1, 1),)
+QUEEN = ((0, 1), (1, 1))
+NIGHTRIDER = ((1, 2),)
+
+# Board topologies as (wrap columns, wrap rows): a move off a wrapped edge comes back on the
+# opposite edge. Wrapping only the rows, (False, True), is the other cylinder.
+FLAT = (False, False)
+CYLINDER = (True, False)
+TORUS = (True, True)
+
+
+# Knight distance on an unbounded board, from the absolute offsets alone
+def infinite_knight_distance(dx, dy):
+    dx, dy = abs(dx), abs(dy)
+    if dx < dy:
+        dx, dy = dy, dx
+    if dx == 1 and dy == 0:
+        return 3
+    if dx == 2 and dy == 2:
+        return 4
+    delta = dx - dy
+    if dy > delta:
+        return delta - 2 * ((delta - dy) // 3)
+    return delta - 2 * ((delta - dy) // 4)
+
+
+# Lower bound on the moves a leaper needs to cover an offset, admissible and consistent on any board.
+# The knight gets its exact unbounded distance; other leapers use the fact that one move changes
+# the Chebyshev distance by at most the longer leg and the Manhattan distance by at most m + n.
+def leaper_heuristic(dx, dy, leaper=KNIGHT):
+    if leaper == KNIGHT:
+        return infinite_knight_distance(dx, dy)
+    return _leg_bound(abs(dx), abs(dy), leaper)
+
+
+def _leg_bound(dx, dy, leaper):
+    m, n = leaper
+    return max(-(-max(dx, dy) // max(m, n)), -(-(dx + dy) // (m + n)))
+
+
+# leaper_heuristic on a board of any topology, where wrapped axes take the shorter way round.
+# The knight's unbounded distance is not monotone in the offset, so on wrapped boards even the
+# knight uses the leg bounds. Those never decrease as an offset grows, so the nearest copy of the
+# goal gives the best bound.
+def topology_heuristic(dx, dy, width, height, leaper=KNIGHT, topology=FLAT):
+    if topology == FLAT:
+        return leaper_heuristic(dx, dy, leaper)
+    dx, dy = abs(dx), abs(dy)
+    if topology[0]:
+        dx = min(dx % width, -dx % width)
+    if topology[1]:
+        dy = min(dy % height, -dy % height)
+    return _leg_bound(dx, dy, leaper)
+
+
+# Breadth-first distance on tiny boards where the closed form has too many exceptions
+@lru_cache(maxsize=None)
+def _small_board_distances(start, width, height):
+    distances = {start: 0}
+    queue = deque([start])
+    while queue:
+        current = queue.popleft()
+        for move in knight_moves:
+            neighbor = (current[0] + move[0], current[1] + move[1])
+            if 0 <= neighbor[0] < width and 0 <= neighbor[1] < height and neighbor not in distances:
+                distances[neighbor] = distances[current] + 1
+                queue.append(neighbor)
+    return distances
+
+
+# Exact minimum number of knight moves between two squares of a width x height board.
+# Returns None when the goal cannot be reached.
+def knight_distance(start, goal, width=BOARD_WIDTH, height=BOARD_HEIGHT):
+    if start == goal:
+        return 0
+
+    # Work with the short side along x so the edge cases below only need one orientation
+    if width > height:
+        start, goal = (start[1], start[0]), (goal[1], goal[0])
+        width, height = height, width
+    dx, dy = abs(goal[0] - start[0]), abs(goal[1] - start[1])
+
+    # One square wide: the knight cannot move at all
+    if width == 1:
+        return None
+
+    # Two squares wide: every move steps two along the board and flips the column
+    if width == 2:
+        if dy % 2:
+            return None
+        moves = dy // 2
+        return moves if moves % 2 == dx else None
+
+    # 3x3, 3x4 and 4x4 have too many irregular squares, so just search them
+    if height < 5:
+        return _small_board_distances(start, width, height).get(goal)
+
+    # A corner and its diagonal neighbour are 4 apart, the shortcut leaves the board
+    if dx == 1 and dy == 1:
+        for x, y in (start, goal):
+            if x in (0, width - 1) and y in (0, height - 1):
+                return 4
+
+    # Three wide: two steps along the middle column cannot use the (2, 2) detour
+    if width == 3 and dx == 0 and dy == 2 and start[0] == 1:
+        return 4
+
+    # Four wide: opposite corners of a short edge need five moves instead of three
+    if width == 4 and dx == 3 and dy == 0 and start[1] in (0, height - 1):
+        return 5
+
+    return infinite_knight_distance(dx, dy)
+
+
+# Knight distance between two squares of an unbounded board, any integer coordinates
+def infinite_distance(start, goal):
+    return infinite_knight_distance(goal[0] - start[0], goal[1] - start[1])
+
+
+# Shortest knight path on an unbounded board as run-length segments [(move, count), ...], built
+# arithmetically without any search. A move is safe to repeat k times exactly when it brings the
+# goal k moves closer, and that only gets harder as k grows, so each run is found by a binary
+# search over k and the whole path needs a handful of runs however far apart the squares are.
+def infinite_path_segments(start, goal):
+    dx, dy = goal[0] - start[0], goal[1] - start[1]
+    remaining = infinite_knight_distance(dx, dy)
+    segments = []
+    while remaining:
+        best_move, best_count = None, 0
+        for move in knight_moves:
+            low, high = 0, remaining
+            while low < high:
+                count = (low + high + 1) // 2
+                if infinite_knight_distance(dx - count * move[0], dy - count * move[1]) == remaining - count:
+                    low = count
+                else:
+                    high = count - 1
+            if low > best_count:
+                best_move, best_count = move, low
+        segments.append((best_move, best_count))
+        dx -= best_count * best_move[0]
+        dy -= best_count * best_move[1]
+        remaining -= best_count
+    return segments
+
+
+# Squares of the shortest unbounded-board path from start to goal, generated one at a time
+# so even paths billions of moves long never have to be held in memory
+def infinite_path(start, goal):
+    x, y = start
+    yield x, y
+    for move, count in infinite_path_segments(start, goal):
+        for _ in range(count):
+            x, y = x + move[0], y + move[1]
+            yield x, y
+
+
+# Leaper moves of every square in compressed sparse row form, compiled once per piece, board size
+# and topology. Squares are numbered row * width + col and the neighbours of square s are
+# targets[offsets[s]:offsets[s + 1]], so searches never repeat the bounds checks or the wrapping.
+# On small wrapped boards several moves can land on the same square, it is listed once.
+@lru_cache(maxsize=None)
+def leaper_adjacency(width=BOARD_WIDTH, height=BOARD_HEIGHT, leaper=KNIGHT, topology=FLAT):
+    moves = leaper_moves(leaper)
+    wrap_x, wrap_y = topology
+    wrapped = wrap_x or wrap_y
+    offsets = array('i', [0])
+    targets = array('i')
+    for row in range(height):
+        for col in range(width):
+            for move in moves:
+                x, y = col + move[0], row + move[1]
+                if 0 <= x < width and 0 <= y < height:
+                    target = y * width + x
+                elif (wrap_x or 0 <= x < width) and (wrap_y or 0 <= y < height):
+                    target = y % height * width + x % width
+                else:
+                    continue
+                if not wrapped or (target != row * width + col and target not in targets[offsets[-1]:]):
+                    targets.append(target)
+            offsets.append(len(targets))
+    return offsets, targets
+
+
+# One byte per square, set for the (col, row) squares listed in blocked. Every function with a
+# blocked argument, here and in the other modules, treats those squares the same way: the piece
+# never lands on them, so a blocked goal cannot be reached.
+def blocked_mask(blocked, width, height):
+    mask = bytearray(width * height)
+    for col, row in blocked:
+        mask[row * width + col] = 1
+    return mask
+
+
+# Path of (col, row) squares from start_square to goal_square by following parent links back
+def _parent_path(parent, start_square, goal_square, width):
+    path = []
+    current = goal_square
+    while current != start_square:
+        path.append((current % width, current // width))
+        current = parent[current]
+    path.append((start_square % width, start_square // width))
+    path.reverse()
+    return path
+
+
+# Symmetries of a width x height board as (swap, flip_x, flip_y): mirror the columns and/or rows,
+# then swap the axes. Every leaper's moves are unchanged by them, so they map shortest paths to
+# shortest paths. A square board has all 8 rotations and reflections, a rectangle only the 4
+# that keep its shape, and swapping axes also needs both or neither axis wrapped.
+def board_symmetries(width=BOARD_WIDTH, height=BOARD_HEIGHT, topology=FLAT):
+    swaps = (False, True) if width == height and topology[0] == topology[1] else (False,)
+    return [(swap, flip_x, flip_y) for swap in swaps for flip_x in (False, True) for flip_y in (False, True)]
+
+
+# The (col, row) square a symmetry moves position to
+def transform(position, symmetry, width=BOARD_WIDTH, height=BOARD_HEIGHT):
+    swap, flip_x, flip_y = symmetry
+    x, y = position
+    if flip_x:
+        x = width - 1 - x
+    if flip_y:
+        y = height - 1 - y
+    return (y, x) if swap else (x, y)
+
+
+# The (col, row) square that transform moved to position, undoing the symmetry
+def inverse_transform(position, symmetry, width=BOARD_WIDTH, height=BOARD_HEIGHT):
+    swap, flip_x, flip_y = symmetry
+    x, y = (position[1], position[0]) if swap else position
+    if flip_x:
+        x = width - 1 - x
+    if flip_y:
+        y = height - 1 - y
+    return x, y
+
+
+# Representative of a (start, goal) query under the board symmetries and reversal: the smallest
+# image of the pair or of the swapped pair, returned as (start, goal, symmetry, reverse). Leaper moves
+# can always be taken back, so a query, its reverse and their rotations and reflections share a
+# representative. A path found for it maps back with inverse_transform, read backwards if reverse.
+def canonical_query(start, goal, width=BOARD_WIDTH, height=BOARD_HEIGHT, topology=FLAT):
+    return min(min((transform(start, symmetry, width, height), transform(goal, symmetry, width, height),
+                    symmetry, False),
+                   (transform(goal, symmetry, width, height), transform(start, symmetry, width, height),
+                    symmetry, True))
+               for symmetry in board_symmetries(width, height, topology))
+
+
+# All-pairs distance and next-move tables for a width x height board, built once per board size.
+# Only goals that are the smallest image of their class under the board symmetries get a row, about
+# an eighth of the squares on a square board, and any other goal is looked up through the symmetry
+# that maps it onto one. rows[goal] is the goal's row, -1 if it has none, and entry
+# row * squares + square holds the distance from square to that goal and the square to step to
+# next, with squares numbered row * width + col and -1 marking unreachable pairs.
+@lru_cache(maxsize=None)
+def all_pairs_table(width=BOARD_WIDTH, height=BOARD_HEIGHT, leaper=KNIGHT):
+    squares = width * height
+    offsets, targets = leaper_adjacency(width, height, leaper, FLAT)
+    symmetries = board_symmetries(width, height)
+    rows = array('i', [-1]) * squares
+    goals = []
+    for goal in range(squares):
+        position = (goal % width, goal // width)
+        if min(transform(position, symmetry, width, height) for symmetry in symmetries) == position:
+            rows[goal] = len(goals)
+            goals.append(goal)
+    distance = array('i', [-1]) * (len(goals) * squares)
+    next_move = array('i', [-1]) * (len(goals) * squares)
+
+    # A breadth-first search outward from each goal; the square a node was reached from is one
+    # move closer to the goal, so it is that node's optimal next move
+    for row, goal in enumerate(goals):
+        offset = row * squares
+        distance[offset + goal] = 0
+        queue = deque([goal])
+        while queue:
+            current = queue.popleft()
+            for neighbor in targets[offsets[current]:offsets[current + 1]]:
+                if distance[offset + neighbor] < 0:
+                    distance[offset + neighbor] = distance[offset + current] + 1
+                    next_move[offset + neighbor] = current
+                    queue.append(neighbor)
+
+    return distance, next_move, rows
+
+
+# Table row and symmetry for a goal, and the start square as seen from that row
+def _table_query(start, goal, width, height):
+    symmetry = min(board_symmetries(width, height), key=lambda symmetry: transform(goal, symmetry, width, height))
+    goal = transform(goal, symmetry, width, height)
+    start = transform(start, symmetry, width, height)
+    return goal[1] * width + goal[0], start[1] * width + start[0], symmetry
+
+
+# Distance between two squares from the all-pairs table, -1 when unreachable
+def table_distance(start, goal, width=BOARD_WIDTH, height=BOARD_HEIGHT, leaper=KNIGHT):
+    distance, _, rows = all_pairs_table(width, height, leaper)
+    goal_square, start_square, _ = _table_query(start, goal, width, height)
+    return distance[rows[goal_square] * width * height + start_square]
+
+
+# Shortest path by following the precomputed next moves, returns ([], None) when unreachable
+def table_path(start, goal, width=BOARD_WIDTH, height=BOARD_HEIGHT, leaper=KNIGHT):
+    distance, next_move, rows = all_pairs_table(width, height, leaper)
+    goal_square, current, symmetry = _table_query(start, goal, width, height)
+    offset = rows[goal_square] * width * height
+    cost = distance[offset + current]
+    if cost < 0:
+        return [], None
+
+    # Walk the path on the goal's row and map every square back to the board as queried
+    path = [start]
+    for _ in range(cost):
+        current = next_move[offset + current]
+        path.append(inverse_transform((current % width, current // width), symmetry, width, height))
+    return path, cost
+
+
+# A* algorithm implementation, returns ([], None) when the goal cannot be reached.
+# Pass a dict as stats to have it filled with the number of expanded nodes and heap pushes.
+# topology makes moves wrap around the board edges, see FLAT, CYLINDER and TORUS.
+def a_star(start, goal, width=BOARD_WIDTH, height=BOARD_HEIGHT, stats=None, leaper=KNIGHT, topology=FLAT):
+    offsets, targets = leaper_adjacency(width, height, leaper, topology)
+    start_square = start[1] * width + start[0]
+    goal_square = goal[1] * width + goal[0]
+
+    def heuristic(square):
+        return topology_heuristic(square % width - goal[0], square // width - goal[1],
+                                  width, height, leaper, topology)
+
+    open_list = []
+    heapq.heappush(open_list, (heuristic(start_square), heuristic(start_square), start_square))
+    came_from = array('i', [-1]) * (width * height)
+    cost_so_far = array('i', [-1]) * (width * height)
+    cost_so_far[start_square] = 0
+    expanded = 0
+    pushes = 1
+
+    while open_list:
+        priority, remaining, current = heapq.heappop(open_list)
+
+        # Skip entries that were superseded by a cheaper push
+        if priority - remaining > cost_so_far[current]:
+            continue
+        expanded += 1
+
+        if current == goal_square:
+            break
+
+        new_cost = cost_so_far[current] + 1
+        for neighbor in targets[offsets[current]:offsets[current + 1]]:
+            if cost_so_far[neighbor] < 0 or new_cost < cost_so_far[neighbor]:
+                cost_so_far[neighbor] = new_cost
+                # Ties on f are broken towards the goal to keep the frontier narrow
+                remaining = heuristic(neighbor)
+                heapq.heappush(open_list, (new_cost + remaining, remaining, neighbor))
+                pushes += 1
+                came_from[neighbor] = current
+
+    if stats is not None:
+        stats['expanded'] = expanded
+        stats['pushes'] = pushes
+
+    if cost_so_far[goal_square] < 0:
+        return [], None
+    return _parent_path(came_from, start_square, goal_square, width), cost_so_far[goal_square]
+
+# Dijkstra's algorithm for finding the cheapest path, with the same result and stats as a_star.
+# terrain optionally gives the small positive cost of entering each square, indexed
+# row * width + col, and without it every move costs 1. Open squares sit in a Dial bucket queue:
+# a ring with one bucket per cost modulo the largest entry cost + 1, so pushes and pops are O(1).
+def dijkstra(start, goal, width=BOARD_WIDTH, height=BOARD_HEIGHT, stats=None, terrain=None, leaper=KNIGHT,
+             topology=FLAT, blocked=()):
+    offsets, targets = leaper_adjacency(width, height, leaper, topology)
+    closed = blocked_mask(blocked, width, height)
+    start_square = start[1] * width + start[0]
+    goal_square = goal[1] * width + goal[0]
+    if terrain is None:
+        terrain = array('i', [1]) * (width * height)
+
+    buckets = [[] for _ in range(max(terrain) + 1)]
+    buckets[0].append(start_square)
+    queued = 1
+    came_from = array('i', [-1]) * (width * height)
+    cost_so_far = array('q', [-1]) * (width * height)
+    cost_so_far[start_square] = 0
+    current_cost = 0
+    expanded = 0
+    pushes = 1
+
+    while queued:
+        bucket = buckets[current_cost % len(buckets)]
+        if not bucket:
+            current_cost += 1
+            continue
+        current = bucket.pop()
+        queued -= 1
+
+        # Skip entries that were superseded by a cheaper push
+        if cost_so_far[current] != current_cost:
+            continue
+        expanded += 1
+
+        if current == goal_square:
+            break
+
+        for neighbor in targets[offsets[current]:offsets[current + 1]]:
+            if closed[neighbor]:
+                continue
+            new_cost = current_cost + terrain[neighbor]
+            if cost_so_far[neighbor] < 0 or new_cost < cost_so_far[neighbor]:
+                cost_so_far[neighbor] = new_cost
+                buckets[new_cost % len(buckets)].append(neighbor)
+                queued += 1
+                pushes += 1
+                came_from[neighbor] = current
+
+    if stats is not None:
+        stats['expanded'] = expanded
+        stats['pushes'] = pushes
+
+    if cost_so_far[goal_square] < 0:
+        return [], None
+    return _parent_path(came_from, start_square, goal_square, width), cost_so_far[goal_square]
+
+
+# Breadth-first search for unit-cost moves, with the same (path, cost) result and optional
+# stats as a_star. Parents double as the visited set.
+def bfs(start, goal, width=BOARD_WIDTH, height=BOARD_HEIGHT, stats=None, leaper=KNIGHT, topology=FLAT):
+    offsets, targets = leaper_adjacency(width, height, leaper, topology)
+    start_square = start[1] * width + start[0]
+    goal_square = goal[1] * width + goal[0]
+    parent = array('i', [-1]) * (width * height)
+    parent[start_square] = start_square
+    queue = deque([start_square])
+    expanded = 0
+    pushes = 1
+
+    # Stop as soon as the goal is discovered, every square in a layer has the same cost
+    while queue and parent[goal_square] < 0:
+        current = queue.popleft()
+        expanded += 1
+        for neighbor in targets[offsets[current]:offsets[current + 1]]:
+            if parent[neighbor] < 0:
+                parent[neighbor] = current
+                queue.append(neighbor)
+                pushes += 1
+
+    if stats is not None:
+        stats['expanded'] = expanded
+        stats['pushes'] = pushes
+
+    if parent[goal_square] < 0:
+        return [], None
+    path = _parent_path(parent, start_square, goal_square, width)
+    return path, len(path) - 1
+
+
+# Complete breadth-first search tree from start, computed once and reused for any goal.
+# Returns distance and parent arrays over squares numbered row * width + col, -1 if unreachable.
+def search_tree(start, width=BOARD_WIDTH, height=BOARD_HEIGHT, blocked=(), leaper=KNIGHT, topology=FLAT):
+    offsets, targets = leaper_adjacency(width, height, leaper, topology)
+    closed = blocked_mask(blocked, width, height)
+    start_square = start[1] * width + start[0]
+    distance = array('i', [-1]) * (width * height)
+    parent = array('i', [-1]) * (width * height)
+    distance[start_square] = 0
+    queue = deque([start_square])
+    while queue:
+        current = queue.popleft()
+        for neighbor in targets[offsets[current]:offsets[current + 1]]:
+            if distance[neighbor] < 0 and not closed[neighbor]:
+                distance[neighbor] = distance[current] + 1
+                parent[neighbor] = current
+                queue.append(neighbor)
+    return distance, parent
+
+
+# Shortest path from the root of a search_tree to goal in O(path length), ([], None) when unreachable
+def tree_path(tree, goal, width=BOARD_WIDTH):
+    distance, parent = tree
+    current = goal[1] * width + goal[0]
+    cost = distance[current]
+    if cost < 0:
+        return [], None
+
+    path = [goal]
+    for _ in range(cost):
+        current = parent[current]
+        path.append((current % width, current // width))
+    path.reverse()
+    return path, cost
+
+
+# Number of distinct shortest paths from start to goal and their length, (0, None) when the goal
+# cannot be reached. A dynamic program over the breadth-first layers adds up the paths into each
+# square from its neighbours one layer closer to the start, so the paths are counted in a single
+# linear pass without ever being listed, with Python ints holding counts of any size.
+def count_shortest_paths(start, goal, width=BOARD_WIDTH, height=BOARD_HEIGHT, blocked=(), leaper=KNIGHT,
+                         topology=FLAT):
+    offsets, targets = leaper_adjacency(width, height, leaper, topology)
+    closed = blocked_mask(blocked, width, height)
+    start_square = start[1] * width + start[0]
+    goal_square = goal[1] * width + goal[0]
+    distance = array('i', [-1]) * (width * height)
+    paths = [0] * (width * height)
+    distance[start_square] = 0
+    paths[start_square] = 1
+    queue = deque([start_square])
+
+    # The goal leaves the queue after every square of the layer before it, its count is complete
+    while queue:
+        current = queue.popleft()
+        if current == goal_square:
+            break
+        for neighbor in targets[offsets[current]:offsets[current + 1]]:
+            if closed[neighbor]:
+                continue
+            if distance[neighbor] < 0:
+                distance[neighbor] = distance[current] + 1
+                queue.append(neighbor)
+            if distance[neighbor] == distance[current] + 1:
+                paths[neighbor] += paths[current]
+
+    if distance[goal_square] < 0:
+        return 0, None
+    return paths[goal_square], distance[goal_square]
+
+
+# Every shortest path from start to goal as a list of (col, row) squares, generated one at a time
+# in lexicographic order and nothing when the goal cannot be reached. The breadth-first layers
+# around the goal tell which moves bring the knight one step closer, so a depth-first walk over
+# those moves never hits a dead end and only ever holds the path it is on.
+def shortest_paths(start, goal, width=BOARD_WIDTH, height=BOARD_HEIGHT, blocked=(), leaper=KNIGHT, topology=FLAT):
+    offsets, targets = leaper_adjacency(width, height, leaper, topology)
+    closed = blocked_mask(blocked, width, height)
+    start_square = start[1] * width + start[0]
+    goal_square = goal[1] * width + goal[0]
+    if closed[goal_square]:
+        return
+
+    # Distances to the goal, every square closer than the start is labelled once it is reached
+    distance = array('i', [-1]) * (width * height)
+    distance[goal_square] = 0
+    queue = deque([goal_square])
+    while queue and distance[start_square] < 0:
+        current = queue.popleft()
+        for neighbor in targets[offsets[current]:offsets[current + 1]]:
+            if distance[neighbor] < 0 and (not closed[neighbor] or neighbor == start_square):
+                distance[neighbor] = distance[current] + 1
+                queue.append(neighbor)
+    if distance[start_square] < 0:
+        return
+
+    # Moves one step closer to the goal, in (col, row) order
+    def closer(square):
+        return iter(sorted((neighbor for neighbor in targets[offsets[square]:offsets[square + 1]]
+                            if distance[neighbor] == distance[square] - 1),
+                           key=lambda neighbor: (neighbor % width, neighbor // width)))
+
+    if start_square == goal_square:
+        yield [start]
+        return
+
+    # One iterator over the remaining moves for every square on the current path
+    path = [start]
+    branches = [closer(start_square)]
+    while branches:
+        square = next(branches[-1], None)
+        if square is None:
+            branches.pop()
+            path.pop()
+        elif square == goal_square:
+            yield path + [goal]
+        else:
+            path.append((square % width, square // width))
+            branches.append(closer(square))
+
+
+# Multi-source breadth-first search grown from every goal at once, stopping when it reaches start.
+# Returns the path from start to the nearest goal and its cost, ([], None) if no goal is reachable.
+def nearest_goal(start, goals, width=BOARD_WIDTH, height=BOARD_HEIGHT, blocked=(), stats=None, leaper=KNIGHT,
+                 topology=FLAT):
+    offsets, targets = leaper_adjacency(width, height, leaper, topology)
+    closed = blocked_mask(blocked, width, height)
+    start_square = start[1] * width + start[0]
+
+    # Each square's parent is one move closer to the goal whose wave reached it first
+    parent = array('i', [-1]) * (width * height)
+    queue = deque()
+    for goal in goals:
+        goal_square = goal[1] * width + goal[0]
+        if parent[goal_square] < 0 and not closed[goal_square]:
+            parent[goal_square] = goal_square
+            queue.append(goal_square)
+    expanded = 0
+    pushes = len(queue)
+
+    while queue and parent[start_square] < 0:
+        current = queue.popleft()
+        expanded += 1
+        for neighbor in targets[offsets[current]:offsets[current + 1]]:
+            if parent[neighbor] < 0 and not closed[neighbor]:
+                parent[neighbor] = current
+                queue.append(neighbor)
+                pushes += 1
+
+    if stats is not None:
+        stats['expanded'] = expanded
+        stats['pushes'] = pushes
+
+    if parent[start_square] < 0:
+        return [], None
+
+    path = [start]
+    current = start_square
+    while parent[current] != current:
+        current = parent[current]
+        path.append((current % width, current // width))
+    return path, len(path) - 1
+
+
+# Bidirectional breadth-first search, growing whichever of the start and goal frontiers is
+# smaller one full layer at a time and splicing the two half paths where they meet
+def bidirectional_bfs(start, goal, width=BOARD_WIDTH, height=BOARD_HEIGHT, stats=None, leaper=KNIGHT, topology=FLAT):
+    offsets, targets = leaper_adjacency(width, height, leaper, topology)
+    squares = width * height
+    start_square = start[1] * width + start[0]
+    goal_square = goal[1] * width + goal[0]
+
+    # Index 0 holds the search from the start, index 1 the search from the goal
+    distance = (array('i', [-1]) * squares, array('i', [-1]) * squares)
+    parent = (array('i', [-1]) * squares, array('i', [-1]) * squares)
+    frontier = ([start_square], [goal_square])
+    distance[0][start_square] = 0
+    distance[1][goal_square] = 0
+    expanded = 0
+    pushes = 2
+
+    best = None if start_square != goal_square else 0
+    meeting = (start_square, goal_square)
+    while best is None and frontier[0] and frontier[1]:
+        side = 0 if len(frontier[0]) <= len(frontier[1]) else 1
+        own_distance, other_distance = distance[side], distance[1 - side]
+        own_parent = parent[side]
+        next_frontier = []
+
+        # Finish the whole layer so the cheapest meeting in it is the one kept
+        for current in frontier[side]:
+            expanded += 1
+            for neighbor in targets[offsets[current]:offsets[current + 1]]:
+                if other_distance[neighbor] >= 0:
+                    total = own_distance[current] + 1 + other_distance[neighbor]
+                    if best is None or total < best:
+                        best = total
+                        meeting = (current, neighbor) if side == 0 else (neighbor, current)
+                if own_distance[neighbor] < 0:
+                    own_distance[neighbor] = own_distance[current] + 1
+                    own_parent[neighbor] = current
+                    next_frontier.append(neighbor)
+                    pushes += 1
+
+        frontier = (next_frontier, frontier[1]) if side == 0 else (frontier[0], next_frontier)
+
+    if stats is not None:
+        stats['expanded'] = expanded
+        stats['pushes'] = pushes
+
+    if best is None:
+        return [], None
+
+    # Walk back to the start for the first half and forward to the goal for the second
+    first_half = []
+    current = meeting[0]
+    while current >= 0:
+        first_half.append(current)
+        current = parent[0][current]
+    first_half.reverse()
+    second_half = []
+    current = meeting[1]
+    while current >= 0 and current != meeting[0]:
+        second_half.append(current)
+        current = parent[1][current]
+
+    path = [(square % width, square // width) for square in first_half + second_half]
+    return path, len(path) - 1
+
+
+# Ray index for a rider, compiled once per piece and board size: for every direction the flat
+# step between squares and, per square numbered row * width + col, how many steps fit on the board
+@lru_cache(maxsize=None)
+def rider_rays(width=BOARD_WIDTH, height=BOARD_HEIGHT, rider=QUEEN):
+    rays = []
+    for dx, dy in sorted({move for leaper in rider for move in leaper_moves(leaper)}):
+        lengths = array('i')
+        for row in range(height):
+            for col in range(width):
+                steps = []
+                if dx:
+                    steps.append((width - 1 - col) // dx if dx > 0 else col // -dx)
+                if dy:
+                    steps.append((height - 1 - row) // dy if dy > 0 else row // -dy)
+                lengths.append(min(steps))
+        rays.append((dy * width + dx, lengths))
+    return rays
+
+
+# Breadth-first search for sliding pieces, where one move travels any distance along a ray and a
+# ray stops at the first blocked square. Returns the squares the piece lands on, with the same
+# (path, cost) result and optional stats as a_star.
+def rider_bfs(start, goal, width=BOARD_WIDTH, height=BOARD_HEIGHT, rider=QUEEN, blocked=(), stats=None):
+    rays = rider_rays(width, height, rider)
+    closed = blocked_mask(blocked, width, height)
+    start_square = start[1] * width + start[0]
+    goal_square = goal[1] * width + goal[0]
+    distance = array('i', [-1]) * (width * height)
+    parent = array('i', [-1]) * (width * height)
+    distance[start_square] = 0
+    queue = deque([start_square])
+    expanded = 0
+    pushes = 1
+
+    while queue and distance[goal_square] < 0:
+        current = queue.popleft()
+        expanded += 1
+        next_distance = distance[current] + 1
+        for step, lengths in rays:
+            square = current
+            for _ in range(lengths[current]):
+                square += step
+                if closed[square]:
+                    break
+                if distance[square] < 0:
+                    distance[square] = next_distance
+                    parent[square] = current
+                    queue.append(square)
+                    pushes += 1
+                elif distance[square] < next_distance:
+                    # That square slides on along this ray at least as cheaply, leave the rest to it
+                    break
+
+    if stats is not None:
+        stats['expanded'] = expanded
+        stats['pushes'] = pushes
+
+    if distance[goal_square] < 0:
+        return [], None
+    return _parent_path(parent, start_square, goal_square, width), distance[goal_square]
+
+
+# Bounded least-recently-used cache of engine results keyed by (start, goal, engine, board signature).
+# The board signature is every keyword argument the engine is called with, so changing the board
+# size, piece, topology or terrain is a different query. Lists and arrays in the arguments, such as
+# terrain, are keyed by a digest of their contents and sets by their contents, so an entry never
+# holds a copy of the board. hits and misses count the lookups. A cached answer expands nothing, so
+# asking for stats raises a ValueError.
+# Unless the board has arguments such as terrain that can break its symmetry, queries are stored
+# under their canonical_query, so a query, its reverse and their rotations and reflections share
+# one entry.
+class PathCache:
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    # Cached (path, cost) of engine(start, goal, **board), running the engine on a miss
+    def query(self, engine, start, goal, **board):
+        if 'stats' in board:
+            raise ValueError('PathCache cannot fill stats, call the engine directly to count its work')
+        width = board.get('width', BOARD_WIDTH)
+        height = board.get('height', BOARD_HEIGHT)
+        symmetry, reverse = (False, False, False), False
+        if set(board) <= SYMMETRIC_ARGUMENTS:
+            start, goal, symmetry, reverse = canonical_query(start, goal, width, height, board.get('topology', FLAT))
+
+        key = (start, goal, engine, tuple(sorted((name, _signature_value(value)) for name, value in board.items())))
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            path, cost = self.entries[key]
+        else:
+            self.misses += 1
+            path, cost = engine(start, goal, **board)
+            self.entries[key] = (tuple(path), cost)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        if reverse:
+            path = path[::-1]
+        return [inverse_transform(square, symmetry, width, height) for square in path], cost
+
+    def clear(self):
+        self.entries.clear()
+
+
+# Engine arguments that describe the board without breaking its symmetry
+SYMMETRIC_ARGUMENTS = {'width', 'height', 'leaper', 'topology', 'rider'}
+
+
+# Hashable stand-in for an engine argument: sets by their contents, and integer sequences such as
+# terrain by their item type and a 16-byte digest of their contents
+def _signature_value(value):
+    if isinstance(value, list):
+        value = array('q', value)
+    elif isinstance(value, bytearray):
+        value = array('B', value)
+    if isinstance(value, array):
+        return value.typecode, hashlib.blake2b(value, digest_size=16).digest()
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    return value
+
+
+# Bitboard masks for the 8x8 board, bit row * 8 + col is set for square (col, row)
+FULL_BOARD = (1 << 64) - 1
+NOT_A_FILE = FULL_BOARD & ~0x0101010101010101
+NOT_AB_FILE = NOT_A_FILE & ~0x0202020202020202
+NOT_H_FILE = FULL_BOARD & ~0x8080808080808080
+NOT_GH_FILE = NOT_H_FILE & ~0x4040404040404040
+
+
+# Every square attacked by a knight on any square of the bitboard, all eight moves at once
+def knight_attacks(bitboard):
+    return ((bitboard << 17 & NOT_A_FILE) | (bitboard << 15 & NOT_H_FILE)
+            | (bitboard << 10 & NOT_AB_FILE) | (bitboard << 6 & NOT_GH_FILE)
+            | (bitboard >> 15 & NOT_A_FILE) | (bitboard >> 17 & NOT_H_FILE)
+            | (bitboard >> 6 & NOT_AB_FILE) | (bitboard >> 10 & NOT_GH_FILE)) & FULL_BOARD
+
+
+# Breadth-first wavefront on the 8x8 board with the frontier and visited sets held as 64-bit ints.
+# Returns the same (path, cost) result and optional stats as a_star.
+def bitboard_bfs(start, goal, stats=None):
+    goal_bit = 1 << (goal[1] * 8 + goal[0])
+    layers = [1 << (start[1] * 8 + start[0])]
+    visited = layers[0]
+    expanded = 0
+
+    while not layers[-1] & goal_bit:
+        expanded += bin(layers[-1]).count('1')
+        frontier = knight_attacks(layers[-1]) & ~visited
+        if not frontier:
+            break
+        visited |= frontier
+        layers.append(frontier)
+
+    if stats is not None:
+        stats['expanded'] = expanded
+        stats['pushes'] = bin(visited).count('1')
+
+    if not layers[-1] & goal_bit:
+        return [], None
+
+    # Walk back through the layers, stepping to the lowest square of the previous layer
+    # that attacks the current one
+    path = [goal]
+    current = goal_bit
+    for layer in reversed(layers[:-1]):
+        candidates = knight_attacks(current) & layer
+        current = candidates & -candidates
+        square = current.bit_length() - 1
+        path.append((square % 8, square // 8))
+    path.reverse()
+    return path, len(path) - 1
+
+
+# Work report: run every query on the board through each engine and compare against knight_distance
+if __name__ == '__main__':
+    squares = [(col, row) for row in range(BOARD_HEIGHT) for col in range(BOARD_WIDTH)]
+    engines = [('A*', a_star), ('Dijkstra', dijkstra), ('BFS', bfs), ('Bidirectional BFS', bidirectional_bfs)]
+    if BOARD_WIDTH == BOARD_HEIGHT == 8:
+        engines.append(('Bitboard BFS', bitboard_bfs))
+    for name, engine in engines:
+        expanded = pushes = suboptimal = 0
+        for start in squares:
+            for goal in squares:
+                stats = {}
+                _, cost = engine(start, goal, stats=stats)
+                expanded += stats['expanded']
+                pushes += stats['pushes']
+                if cost != knight_distance(start, goal):
+                    suboptimal += 1
+        queries = len(squares) ** 2
+        print(f'{name}: {expanded / queries:.1f} expanded, {pushes / queries:.1f} pushes per query, '
+              f'{suboptimal} suboptimal of {queries}')
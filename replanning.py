@@ -0,0 +1,119 @@
+import heapq
+
+from pathfinding import KNIGHT, BOARD_WIDTH, BOARD_HEIGHT, FLAT, blocked_mask, leaper_adjacency, topology_heuristic
+
+INFINITY = float('inf')
+
+
+# Lifelong Planning A* between a fixed start and goal on a board with blocked squares.
+# Toggling a blocked square only repairs the part of the search tree whose costs changed,
+# instead of searching the whole board again.
+class LifelongPlanner:
+    def __init__(self, start, goal, width=BOARD_WIDTH, height=BOARD_HEIGHT, blocked=(), leaper=KNIGHT, topology=FLAT):
+        self.width = width
+        self.height = height
+        self.leaper = leaper
+        self.topology = topology
+        self.offsets, self.targets = leaper_adjacency(width, height, leaper, topology)
+        self.start = start[1] * width + start[0]
+        self.goal = goal[1] * width + goal[0]
+        self.blocked = blocked_mask(blocked, width, height)
+
+        # g is the settled cost from the start, rhs the one-step lookahead from the neighbours
+        self.g = [INFINITY] * (width * height)
+        self.rhs = [INFINITY] * (width * height)
+        self.rhs[self.start] = 0
+        self.open_list = []
+        self.queued_key = {}
+        self._push(self.start)
+        self._compute_shortest_path()
+
+    # Admissible and consistent distance to the goal, the same heuristic as a_star
+    def _heuristic(self, square):
+        return topology_heuristic(square % self.width - self.goal % self.width,
+                                  square // self.width - self.goal // self.width,
+                                  self.width, self.height, self.leaper, self.topology)
+
+    def _key(self, square):
+        best = min(self.g[square], self.rhs[square])
+        return (best + self._heuristic(square), best)
+
+    def _push(self, square):
+        key = self._key(square)
+        self.queued_key[square] = key
+        heapq.heappush(self.open_list, (key, square))
+
+    # Drop heap entries that were removed or re-keyed since they were pushed
+    def _top_key(self):
+        while self.open_list:
+            key, square = self.open_list[0]
+            if self.queued_key.get(square) == key:
+                return key
+            heapq.heappop(self.open_list)
+        return (INFINITY, INFINITY)
+
+    def _neighbors(self, square):
+        return self.targets[self.offsets[square]:self.offsets[square + 1]]
+
+    # Recompute rhs from the neighbours and requeue the square if it became inconsistent
+    def _update_square(self, square):
+        if square != self.start:
+            best = INFINITY
+            if not self.blocked[square]:
+                for neighbor in self._neighbors(square):
+                    if not self.blocked[neighbor] and self.g[neighbor] + 1 < best:
+                        best = self.g[neighbor] + 1
+            self.rhs[square] = best
+        if self.g[square] != self.rhs[square]:
+            self._push(square)
+        else:
+            self.queued_key.pop(square, None)
+
+    def _compute_shortest_path(self):
+        expanded = 0
+        while (self._top_key() < self._key(self.goal)
+               or self.rhs[self.goal] != self.g[self.goal]):
+            _, square = heapq.heappop(self.open_list)
+            del self.queued_key[square]
+            expanded += 1
+            if self.g[square] > self.rhs[square]:
+                # Overconsistent: the square got cheaper, settle it and relax its neighbours
+                self.g[square] = self.rhs[square]
+            else:
+                # Underconsistent: the square got dearer, reopen it along with its neighbours
+                self.g[square] = INFINITY
+                self._update_square(square)
+            for neighbor in self._neighbors(square):
+                self._update_square(neighbor)
+        return expanded
+
+    # Block or unblock a square and repair the search, returns the new (path, cost).
+    # Pass a dict as stats to have it filled with the number of squares expanded by the repair.
+    def toggle_blocked(self, square, stats=None):
+        index = square[1] * self.width + square[0]
+        self.blocked[index] ^= 1
+
+        # Only the square itself and its neighbours have edges whose cost changed
+        self._update_square(index)
+        for neighbor in self._neighbors(index):
+            self._update_square(neighbor)
+        expanded = self._compute_shortest_path()
+
+        if stats is not None:
+            stats['expanded'] = expanded
+        return self.path()
+
+    # Current shortest path from start to goal, ([], None) when the goal is cut off
+    def path(self):
+        if self.blocked[self.start] or self.g[self.goal] == INFINITY:
+            return [], None
+
+        # Walk back from the goal through the cheapest open neighbour each time
+        path = [self.goal]
+        current = self.goal
+        while current != self.start:
+            current = min((neighbor for neighbor in self._neighbors(current) if not self.blocked[neighbor]),
+                          key=self.g.__getitem__)
+            path.append(current)
+        path.reverse()
+        return [(square % self.width, square // self.width) for square in path], len(path) - 1
@@ -0,0 +1,332 @@
+import random
+from functools import lru_cache
+
+from pathfinding import KNIGHT, BOARD_WIDTH, BOARD_HEIGHT, FLAT, leaper_adjacency, leaper_moves
+
+# Boards up to this many squares fall back to a backtracking search when Warnsdorff's rule fails
+BACKTRACK_SQUARES = 1024
+
+# Moves the backtracking search may try before giving up on a board
+BACKTRACK_LIMIT = 200000
+
+# Squares the randomized Warnsdorff restarts may visit in total before giving up on a board
+RESTART_LIMIT = 1000000
+
+# Randomized Warnsdorff runs tried when looking for a closed tour of one block of a stitched tour
+CLOSED_TOUR_TRIES = 10000
+
+
+# Open tour of a width x height board from start, visiting every square exactly once, as a list
+# of (col, row) squares. Returns None when no tour was found. That is certain on boards too small
+# to have one, on odd-sized boards started on the colour with fewer squares and on knight boards
+# with a side of 4 started on one of its middle two lines. Elsewhere None only means that every
+# method below gave up, not that no tour exists.
+#
+# Warnsdorff's rule always moves to the square with the fewest onward moves, breaking ties towards
+# the edge of the board (Roth's rule). Every step looks at a fixed number of neighbours, so tours
+# of 1000x1000 boards take seconds. A run that gets stuck is retried with the moves tried in
+# another order and then without Roth's rule. Knights then fall back to a closed tour stitched
+# together from small blocks, which exists on every board that has a closed tour at all and can
+# be entered at any square. Boards without one, such as 4xN boards, are retried with random
+# tie-breaking, and small boards finish with a backtracking search.
+def knights_tour(start=(0, 0), width=BOARD_WIDTH, height=BOARD_HEIGHT, leaper=KNIGHT):
+    squares = width * height
+    if squares % 2 and sum(leaper) % 2 and (start[0] + start[1]) % 2:
+        # Colour-changing pieces alternate colours, so the minority colour cannot come first
+        return None
+    if leaper == KNIGHT and (width == 4 and start[0] in (1, 2) or height == 4 and start[1] in (1, 2)):
+        # Across a side of 4 the knight only moves between the outer and the middle two lines. A
+        # tour starting on a middle line would alternate between them and so stay on one colour.
+        return None
+
+    offsets, targets = leaper_adjacency(width, height, leaper, FLAT)
+    start_square = start[1] * width + start[0]
+
+    # Rank candidate moves by onward move count, breaking ties towards the edge of the board with
+    # the negated squared distance from the centre, doubled to stay in integers
+    def edge_rank(square, degree):
+        return (degree[square], -(2 * (square % width) - width + 1) ** 2 - (2 * (square // width) - height + 1) ** 2)
+
+    # Plain move order tie-breaking, which covers the narrow boards where Roth's rule gets stuck
+    def degree_rank(square, degree):
+        return degree[square]
+
+    tour = None
+    for rank in (edge_rank, degree_rank):
+        for rotation in range(len(leaper_moves(leaper))):
+            tour = _warnsdorff_tour(start_square, offsets, targets, rank, rotation)
+            if tour is not None:
+                break
+        if tour is not None:
+            break
+    else:
+        if leaper == KNIGHT and _has_closed_tour(width, height):
+            tour = _stitched_tour(start_square, width, height, offsets, targets)
+        if tour is None:
+            rng = random.Random(start_square)
+
+            def random_rank(square, degree):
+                return degree[square], rng.random()
+
+            for _ in range(max(1, RESTART_LIMIT // squares)):
+                tour = _warnsdorff_tour(start_square, offsets, targets, random_rank, 0)
+                if tour is not None:
+                    break
+        if tour is None and squares <= BACKTRACK_SQUARES:
+            tour = _backtracking_tour(start_square, offsets, targets, edge_rank)
+        if tour is None:
+            return None
+    return [(square % width, square // width) for square in tour]
+
+
+# Onward move count of every square of a board in compressed sparse row form
+def _degrees(offsets):
+    return [offsets[square + 1] - offsets[square] for square in range(len(offsets) - 1)]
+
+
+# One greedy Warnsdorff run, trying each square's moves from index rotation onwards.
+# Returns the squares in order, or None if the knight is stuck before the board is covered.
+def _warnsdorff_tour(start_square, offsets, targets, rank, rotation):
+    degree = _degrees(offsets)
+    visited = bytearray(len(degree))
+    tour = [start_square]
+    visited[start_square] = 1
+    current = start_square
+    for _ in range(len(degree) - 1):
+        neighbors = targets[offsets[current]:offsets[current + 1]]
+        best = best_rank = None
+        for neighbor in neighbors[rotation:] + neighbors[:rotation]:
+            if not visited[neighbor]:
+                degree[neighbor] -= 1
+                neighbor_rank = rank(neighbor, degree)
+                if best is None or neighbor_rank < best_rank:
+                    best, best_rank = neighbor, neighbor_rank
+        if best is None:
+            return None
+        visited[best] = 1
+        tour.append(best)
+        current = best
+    return tour
+
+
+# Depth-first search over Warnsdorff's move order, for the few small boards where the greedy
+# runs get stuck. Returns None if no tour turns up within BACKTRACK_LIMIT moves.
+def _backtracking_tour(start_square, offsets, targets, rank):
+    degree = _degrees(offsets)
+    visited = bytearray(len(degree))
+
+    def visit(square):
+        visited[square] = 1
+        for neighbor in targets[offsets[square]:offsets[square + 1]]:
+            degree[neighbor] -= 1
+        # Best move last, so that pop() tries it first
+        return sorted((neighbor for neighbor in targets[offsets[square]:offsets[square + 1]] if not visited[neighbor]),
+                      key=lambda neighbor: rank(neighbor, degree), reverse=True)
+
+    tour = [start_square]
+    choices = [visit(start_square)]
+    budget = BACKTRACK_LIMIT
+    while len(tour) < len(degree):
+        if choices[-1]:
+            budget -= 1
+            if budget == 0:
+                return None
+            square = choices[-1].pop()
+            tour.append(square)
+            choices.append(visit(square))
+
+            # A neighbour left without onward moves can only be the last square of the tour,
+            # so the knight has to step onto it next and finish there
+            stranded = [neighbor for neighbor in choices[-1] if degree[neighbor] == 0]
+            if stranded and (len(stranded) > 1 or len(tour) < len(degree) - 1):
+                choices[-1] = []
+        else:
+            # Out of moves, step back and undo the last square
+            choices.pop()
+            if not choices:
+                return None
+            square = tour.pop()
+            visited[square] = 0
+            for neighbor in targets[offsets[square]:offsets[square + 1]]:
+                degree[neighbor] += 1
+    return tour
+
+
+# Whether a width x height board has a closed knight's tour (Schwenk's theorem): not both sides
+# odd, the shorter side not 1, 2 or 4, and no 3x4, 3x6 or 3x8 board
+def _has_closed_tour(width, height):
+    short, long = sorted((width, height))
+    return not (short % 2 and long % 2) and short not in (1, 2, 4) and not (short == 3 and long in (4, 6, 8))
+
+
+# Closed knight's tour of a board with one, entered at start_square. The board is cut into blocks
+# of 5 to 11 squares a side, each with a closed tour of its own, and the block tours are joined in
+# snake order: one move of the next block's tour and a parallel move of the tour so far are
+# swapped for the two moves that cross between their ends. Boards 3 squares across start from a
+# 3x10 or 3x12 closed tour and add 3x4 blocks, which have no closed tour, by splicing an open tour
+# of the block into a move of the tour so far in the same way. Returns None if a block has no
+# closed tour within CLOSED_TOUR_TRIES runs or two blocks cannot be joined.
+def _stitched_tour(start_square, width, height, offsets, targets):
+    if width == 3 or height == 3:
+        cols = _block_sizes(width, 'narrow' if height == 3 else 'whole')
+        rows = _block_sizes(height, 'narrow' if width == 3 else 'whole')
+    else:
+        # Blocks with both sides odd have no closed tour, so an even side is always cut evenly
+        cols = _block_sizes(width, 'even' if width % 2 == 0 else 'any')
+        rows = _block_sizes(height, 'even' if width % 2 else 'any')
+
+    blocks = []
+    top = 0
+    for row_index, block_height in enumerate(rows):
+        left = 0
+        row_blocks = []
+        for block_width in cols:
+            row_blocks.append((left, top, block_width, block_height))
+            left += block_width
+        blocks.extend(row_blocks if row_index % 2 == 0 else row_blocks[::-1])
+        top += block_height
+
+    # links[square] holds the square's neighbours on the tour, one for the ends of an open block
+    # tour that is not joined yet. Each block is laid down with the first of its tours that joins
+    # onto the tour so far.
+    links = [None] * (width * height)
+    for index, (left, top, block_width, block_height) in enumerate(blocks):
+        for tour, closed in _block_tours(block_width, block_height):
+            squares = [(top + square // block_width) * width + left + square % block_width for square in tour]
+            for position, square in enumerate(squares):
+                links[square] = [squares[position - 1], squares[(position + 1) % len(squares)]]
+            if not closed:
+                links[squares[0]].pop(0)
+                links[squares[-1]].pop()
+            if index == 0 or _join_blocks(links, blocks[index - 1], blocks[index], closed, width, offsets, targets):
+                break
+        else:
+            return None
+
+    tour = [start_square]
+    previous, current = None, start_square
+    for _ in range(width * height - 1):
+        previous, current = current, links[current][0] if links[current][0] != previous else links[current][1]
+        tour.append(current)
+    return tour
+
+
+# Block sides for one axis of a stitched tour. 'even' and 'any' keep an axis of up to 11 squares
+# whole and otherwise cut it into sides of 5 to 11, all even for 'even'. 'narrow' cuts the long
+# side of a board 3 squares across into 10 or 12 and then 4s, and 'whole' never cuts the axis.
+def _block_sizes(length, kind):
+    if kind == 'whole' or (kind != 'narrow' and length <= 11) or (kind == 'narrow' and length <= 18):
+        return [length]
+    if kind == 'narrow':
+        first = 10 if length % 4 == 2 else 12
+        return [first] + [4] * ((length - first) // 4)
+    sizes = [8] * (length // 8)
+    remainder = length % 8
+    if remainder in (5, 6, 7):
+        sizes.append(remainder)
+    elif remainder == 4:
+        sizes[-1:] = [6, 6]
+    elif remainder:
+        sizes[-1] += remainder
+    return sizes
+
+
+# Tours a stitched tour may lay down in a width x height block, as (squares, closed) pairs: the
+# mirror images of a closed tour, or every open tour of a block too small to have a closed one
+@lru_cache(maxsize=None)
+def _block_tours(width, height):
+    if not _has_closed_tour(width, height):
+        offsets, targets = leaper_adjacency(width, height, KNIGHT, FLAT)
+        return tuple((tour, False) for tour in _open_tours(offsets, targets))
+    cycle = _closed_tour(width, height)
+    if cycle is None:
+        return ()
+    tours = []
+    for flip_x, flip_y in ((False, False), (True, False), (False, True), (True, True)):
+        tour = []
+        for square in cycle:
+            col, row = square % width, square // width
+            if flip_x:
+                col = width - 1 - col
+            if flip_y:
+                row = height - 1 - row
+            tour.append(row * width + col)
+        tours.append((tuple(tour), True))
+    return tuple(tours)
+
+
+# Every open tour of a small board in compressed sparse row form, by depth-first search
+def _open_tours(offsets, targets):
+    squares = len(offsets) - 1
+    tours = []
+    tour = []
+    visited = bytearray(squares)
+
+    def extend(square):
+        tour.append(square)
+        visited[square] = 1
+        if len(tour) == squares:
+            tours.append(tuple(tour))
+        for neighbor in targets[offsets[square]:offsets[square + 1]]:
+            if not visited[neighbor]:
+                extend(neighbor)
+        visited[square] = 0
+        tour.pop()
+
+    for square in range(squares):
+        extend(square)
+    return tours
+
+
+# Closed knight's tour of a width x height block found with randomized Warnsdorff runs, as a tuple
+# of squares numbered row * width + col, or None if none turned up within CLOSED_TOUR_TRIES runs
+@lru_cache(maxsize=None)
+def _closed_tour(width, height):
+    offsets, targets = leaper_adjacency(width, height, KNIGHT, FLAT)
+    rng = random.Random(width * height)
+
+    def random_rank(square, degree):
+        return degree[square], rng.random()
+
+    for _ in range(CLOSED_TOUR_TRIES):
+        tour = _warnsdorff_tour(rng.randrange(width * height), offsets, targets, random_rank, 0)
+        if tour is not None and tour[0] in targets[offsets[tour[-1]]:offsets[tour[-1] + 1]]:
+            return tuple(tour)
+    return None
+
+
+# Join the tour through next_block, closed or open, onto the tour through block, both blocks given
+# as (left, top, width, height). Looks for a move a - b of the tour in the first block and, in the
+# second, a move c - d of a closed tour or the two ends c and d of an open one, with knight moves
+# a - c and b - d. The moves a - b and c - d are swapped for a - c and b - d.
+def _join_blocks(links, block, next_block, closed, width, offsets, targets):
+    first = _block_squares(block, width)
+    second = _block_squares(next_block, width)
+    for a in first:
+        for c in targets[offsets[a]:offsets[a + 1]]:
+            if c not in second:
+                continue
+            for b in links[a]:
+                if b not in first:
+                    continue
+                for d in targets[offsets[b]:offsets[b + 1]]:
+                    if d not in second or d == c:
+                        continue
+                    if closed and d in links[c]:
+                        links[c][links[c].index(d)] = a
+                        links[d][links[d].index(c)] = b
+                    elif not closed and len(links[c]) == 1 and len(links[d]) == 1:
+                        links[c].append(a)
+                        links[d].append(b)
+                    else:
+                        continue
+                    links[a][links[a].index(b)] = c
+                    links[b][links[b].index(a)] = d
+                    return True
+    return False
+
+
+# Squares of a (left, top, width, height) block of a board width squares across
+def _block_squares(block, width):
+    left, top, block_width, block_height = block
+    return {row * width + col for row in range(top, top + block_height) for col in range(left, left + block_width)}
@@ -0,0 +1,68 @@
+import numpy as np
+
+from distance_fields import frontier_bfs, step_back_path
+
+# Constants for the cubic board, positions are (x, y, z) with every coordinate in range(CUBE_SIZE)
+CUBE_SIZE = 8
+
+# 3D leapers jump a fixed (a, b, c) offset along the three axes in any order and direction.
+# The 3D knight moves two squares along one axis and one along another.
+KNIGHT_3D = (0, 1, 2)
+
+
+# Every move of a 3D leaper: all orderings of its legs with every choice of signs, 24 for the knight
+def leaper_moves_3d(leaper=KNIGHT_3D):
+    a, b, c = leaper
+    moves = set()
+    for legs in ((a, b, c), (a, c, b), (b, a, c), (b, c, a), (c, a, b), (c, b, a)):
+        for sx in (1, -1):
+            for sy in (1, -1):
+                for sz in (1, -1):
+                    moves.add((sx * legs[0], sy * legs[1], sz * legs[2]))
+    return sorted(moves)
+
+
+# Single-source leaper distances for every cell of a size x size x size board as a
+# (size, size, size) int32 array indexed [z, y, x], -1 where the cell cannot be reached.
+# As in distance_field the board is stored flat with a blocked border as wide as the longest leg,
+# and frontier_bfs expands all 24 moves of the whole frontier with a few array operations and no
+# bounds checks; 200 ** 3 cells take seconds. With a goal the search stops once the goal's layer
+# is reached.
+def distance_volume(start, size=CUBE_SIZE, goal=None, leaper=KNIGHT_3D):
+    padding = max(leaper)
+    padded_size = size + 2 * padding
+    distance = np.full((padded_size,) * 3, -2, dtype=np.int32)
+    distance[padding:-padding, padding:-padding, padding:-padding] = -1
+    distance = distance.ravel()
+    offsets = np.array([(dz * padded_size + dy) * padded_size + dx for dx, dy, dz in leaper_moves_3d(leaper)],
+                       dtype=np.int64)
+
+    def padded(cell):
+        return ((cell[2] + padding) * padded_size + cell[1] + padding) * padded_size + cell[0] + padding
+
+    frontier_bfs(distance, padded(start), lambda frontier: (frontier[:, None] + offsets).ravel(),
+                 None if goal is None else padded(goal))
+    distance = distance.reshape((padded_size,) * 3)
+    return distance[padding:-padding, padding:-padding, padding:-padding].copy()
+
+
+# Shortest path to goal read back from a distance volume, ([], None) when goal is unreachable
+def volume_path(volume, goal, leaper=KNIGHT_3D):
+    size = volume.shape[0]
+    moves = leaper_moves_3d(leaper)
+    cost = int(volume[goal[2], goal[1], goal[0]])
+    if cost < 0:
+        return [], None
+
+    def neighbors(cell):
+        for dx, dy, dz in moves:
+            x, y, z = cell[0] + dx, cell[1] + dy, cell[2] + dz
+            if 0 <= x < size and 0 <= y < size and 0 <= z < size:
+                yield x, y, z
+
+    return step_back_path(goal, cost, neighbors, lambda cell: volume[cell[2], cell[1], cell[0]]), cost
+
+
+# Breadth-first search on the cubic board with the same (path, cost) result as a_star
+def bfs_3d(start, goal, size=CUBE_SIZE, leaper=KNIGHT_3D):
+    return volume_path(distance_volume(start, size, goal, leaper), goal, leaper)